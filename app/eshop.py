@@ -1,21 +1,32 @@
+import csv
+import io
+import json
+import math
+import mmap
+import time
 import uuid
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
 from services import ShippingService
 
 
 class Product:
     def __init__(self, available_amount: int, name: str, price: float):
-        if price < 0:
-            raise ValueError("Price cannot be negative")
-        if available_amount < 0:
-            raise ValueError("Available amount cannot be negative")
+        self.validate(available_amount, price)
 
         self.available_amount = available_amount
         self.name = name
         self.price = price
 
+    @staticmethod
+    def validate(available_amount: int, price: float):
+        if price < 0:
+            raise ValueError("Price cannot be negative")
+        if available_amount < 0:
+            raise ValueError("Available amount cannot be negative")
 
     def is_available(self, requested_amount: int) -> bool:
         return self.available_amount >= requested_amount
@@ -92,3 +103,172 @@ class Shipment:
 
     def check_shipping_status(self) -> str:
         return self.shipping_service.check_status(self.shipping_id)
+
+
+@dataclass
+class LoadStats:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class StockLoader:
+    """Streams a CSV or JSONL stock feed into a catalog of products keyed by name.
+
+    Rows carry a non-empty ``name`` plus either ``price``/``available_amount``
+    (create or overwrite a product) or ``stock_delta`` (adjust an existing
+    product); rows mixing ``stock_delta`` with absolute fields are rejected.
+    Quantities must be whole numbers; booleans and strings with ``_`` are not
+    accepted as numbers.
+    Rows are validated one chunk at a time and a chunk is applied only if all
+    of its rows are valid. A failure raises ``ValueError`` but leaves the
+    chunks before it applied to the catalog.
+
+    ``progress``, if given, is called with the running ``LoadStats`` after
+    each applied chunk.
+    """
+
+    FORMATS = ('csv', 'jsonl')
+
+    def __init__(self, catalog: Optional[Dict[str, Product]] = None, chunk_size: int = 10000):
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive")
+        self.catalog: Dict[str, Product] = catalog if catalog is not None else {}
+        self.chunk_size = chunk_size
+
+    def load(self, path, file_format: Optional[str] = None,
+             progress: Optional[Callable[[LoadStats], None]] = None) -> LoadStats:
+        path = Path(path)
+        file_format = (file_format or path.suffix.lstrip('.')).lower()
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Unsupported stock feed format: {file_format}")
+
+        stats = LoadStats()
+        started = time.perf_counter()
+        with open(path, 'rb') as file:
+            lines = self._read_lines(file)
+            rows = csv.DictReader(lines) if file_format == 'csv' else self._read_jsonl(lines)
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                self._apply_chunk(chunk, stats)
+                stats.elapsed = time.perf_counter() - started
+                if progress:
+                    progress(stats)
+
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+    @staticmethod
+    def _read_lines(file) -> Iterator[str]:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and pipes cannot be memory-mapped.
+            yield from io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+            return
+
+        with mapped:
+            # Only the first line may start with a byte order mark.
+            encoding = 'utf-8-sig'
+            for line in iter(mapped.readline, b''):
+                yield line.decode(encoding)
+                encoding = 'utf-8'
+
+    @staticmethod
+    def _read_jsonl(lines: Iterator[str]) -> Iterator[dict]:
+        for line_number, line in enumerate(lines, start=1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as error:
+                    raise ValueError(f"Invalid stock row at line {line_number}: {error}") from error
+
+    @staticmethod
+    def _to_float(value) -> float:
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(f"Expected a number, got {value!r}")
+        if isinstance(value, str) and '_' in value:
+            raise ValueError(f"Expected a number, got {value!r}")
+        try:
+            number = float(value)
+        except OverflowError as error:
+            raise ValueError(f"Expected a finite number, got {value!r}") from error
+        if not math.isfinite(number):
+            raise ValueError(f"Expected a finite number, got {value!r}")
+        return number
+
+    @staticmethod
+    def _to_int(value) -> int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, str) and '_' not in value:
+            try:
+                return int(value)
+            except ValueError:
+                pass
+        number = StockLoader._to_float(value)
+        if not number.is_integer():
+            raise ValueError(f"Expected a whole number, got {value!r}")
+        return int(number)
+
+    @staticmethod
+    def _field(row: dict, key: str, cast):
+        value = row.get(key)
+        if value is None or value == '':
+            return None
+        return cast(value)
+
+    def _apply_chunk(self, chunk: List[dict], stats: LoadStats):
+        staged: Dict[str, list] = {}
+        for offset, row in enumerate(chunk, start=stats.rows + 1):
+            try:
+                name = row['name']
+                if not isinstance(name, str) or not name.strip():
+                    raise ValueError(f"Expected a product name, got {name!r}")
+                available_amount = self._field(row, 'available_amount', self._to_int)
+                price = self._field(row, 'price', self._to_float)
+                stock_delta = self._field(row, 'stock_delta', self._to_int)
+
+                current = staged.get(name)
+                if current is None and name in self.catalog:
+                    product = self.catalog[name]
+                    current = [product.available_amount, product.price]
+
+                if stock_delta is not None:
+                    if available_amount is not None or price is not None:
+                        raise ValueError("stock_delta cannot be combined with price or available_amount")
+                    if current is None:
+                        raise ValueError(f"Unknown product {name}")
+                    available_amount = current[0] + stock_delta
+                    price = current[1]
+                elif current is None:
+                    if available_amount is None or price is None:
+                        raise ValueError(f"New product {name} needs price and available_amount")
+                else:
+                    available_amount = current[0] if available_amount is None else available_amount
+                    price = current[1] if price is None else price
+
+                Product.validate(available_amount, price)
+            except (AttributeError, KeyError, TypeError, ValueError) as error:
+                raise ValueError(f"Invalid stock row {offset}: {error}") from error
+
+            staged[name] = [available_amount, price]
+
+        for name, (available_amount, price) in staged.items():
+            product = self.catalog.get(name)
+            if product is None:
+                self.catalog[name] = Product(available_amount, name, price)
+                stats.created += 1
+            else:
+                product.available_amount = available_amount
+                product.price = price
+                stats.updated += 1
+
+        stats.rows += len(chunk)
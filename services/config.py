@@ -4,3 +4,6 @@ AWS_ENDPOINT_URL = os.getenv("AWS_ENDPOINT_URL", "http://localhost:4566")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 SHIPPING_TABLE_NAME = os.getenv("SHIPPING_TABLE_NAME", "ShippingTable")
 SHIPPING_QUEUE = os.getenv("SHIPPING_QUEUE_NAME", "ShippingQueue")
+SHIPPING_WRITE_BEHIND = os.getenv("SHIPPING_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+SHIPPING_FLUSH_BATCH_SIZE = int(os.getenv("SHIPPING_FLUSH_BATCH_SIZE", "25"))
+SHIPPING_FLUSH_INTERVAL = float(os.getenv("SHIPPING_FLUSH_INTERVAL", "1.0"))
@@ -1,22 +1,75 @@
 
-from .config import SHIPPING_TABLE_NAME
+from .config import (
+    SHIPPING_TABLE_NAME,
+    SHIPPING_WRITE_BEHIND,
+    SHIPPING_FLUSH_BATCH_SIZE,
+    SHIPPING_FLUSH_INTERVAL,
+)
 from .db import get_dynamodb_resource
 
+import atexit
+import logging
+import threading
+import weakref
 from uuid import uuid4
 from datetime import datetime, timezone
 
+from botocore.exceptions import ClientError
+
+
+logger = logging.getLogger(__name__)
+
+# DynamoDB rejects transactions with more items than this.
+MAX_TRANSACTION_ITEMS = 25
+# Upper bound for the delay between retries of a failed flush.
+MAX_RETRY_INTERVAL = 60.0
+
+_write_behind_repositories = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_write_behind_repositories():
+    for repository in list(_write_behind_repositories):
+        repository.close()
+
 
 class ShippingRepository:
 
 
-    def __init__(self):
+    def __init__(self, write_behind: bool = SHIPPING_WRITE_BEHIND,
+                 flush_batch_size: int = SHIPPING_FLUSH_BATCH_SIZE,
+                 flush_interval: float = SHIPPING_FLUSH_INTERVAL):
         dynamo_resource = get_dynamodb_resource()
         self.table = dynamo_resource.Table(SHIPPING_TABLE_NAME)
 
+        self.write_behind = write_behind
+        self.flush_batch_size = max(1, min(flush_batch_size, MAX_TRANSACTION_ITEMS))
+        self.flush_interval = flush_interval
+
+        # shipping_id -> (latest status, status the table must hold before it)
+        self._pending = {}
+        # updates taken by a running flush, visible to reads until written
+        self._inflight = {}
+        self._pending_lock = threading.Lock()
+        # held for the whole write, so batches land in the order they were taken
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self._retry_interval = flush_interval
+
+        if self.write_behind:
+            _write_behind_repositories.add(self)
+
 
     def get_shipping(self, shipping_id):
         response = self.table.get_item(Key={"shipping_id": shipping_id})
-        return response.get("Item")
+        item = response.get("Item")
+
+        with self._pending_lock:
+            pending = self._pending.get(shipping_id) or self._inflight.get(shipping_id)
+        if item is not None and pending is not None:
+            item = {**item, "shipping_status": pending[0]}
+
+        return item
 
     def create_shipping(self, shipping_type: str, product_ids: list, order_id: str, status: str, due_date: datetime):
         shipping_id = str(uuid4())
@@ -32,15 +85,169 @@ class ShippingRepository:
         self.table.put_item(Item=item)
         return shipping_id
 
-    def update_shipping_status(self, shipping_id, status):
-        response = self.table.update_item(
-            Key={
+    def update_shipping_status(self, shipping_id, status, expected_status=None):
+        """Set the status of a shipping.
+
+        With ``expected_status`` the update is skipped when the stored status
+        differs, so a late write cannot overwrite a newer transition made
+        elsewhere; the ConditionalCheckFailed error response is returned then.
+        In write-behind mode the update is queued and
+        ``{'ResponseMetadata': {'HTTPStatusCode': 202, 'WriteBehind': True}}``
+        is returned; call ``flush()`` when the write must be durable. A queued
+        update whose ``expected_status`` differs from the status already
+        queued for the shipping is dropped, as its write would fail. Errors of
+        a flush triggered here are logged and the updates stay queued.
+        """
+        if not self.write_behind:
+            return self._write_status(shipping_id, status, expected_status)
+
+        with self._pending_lock:
+            self._queue(self._pending, shipping_id, status, expected_status)
+            pending_count = len(self._pending)
+            if self._timer is None and self.flush_interval > 0:
+                self._schedule_flush(self.flush_interval)
+
+        if pending_count >= self.flush_batch_size:
+            try:
+                self.flush()
+            except Exception:
+                # The update is requeued and retried; only explicit flushes raise.
+                logger.exception("Write-behind flush of shipping statuses failed")
+
+        return {'ResponseMetadata': {'HTTPStatusCode': 202, 'WriteBehind': True}}
+
+    def flush(self):
+        """Synchronously write every pending status update to the table."""
+        with self._flush_lock:
+            with self._pending_lock:
+                pending = list(self._pending.items())
+                self._inflight = self._pending
+                self._pending = {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            for start in range(0, len(pending), self.flush_batch_size):
+                batch = pending[start:start + self.flush_batch_size]
+                try:
+                    self._write_batch(batch)
+                except Exception:
+                    self._requeue(pending[start:])
+                    raise
+                with self._pending_lock:
+                    for shipping_id, _ in batch:
+                        self._inflight.pop(shipping_id, None)
+
+            with self._pending_lock:
+                self._retry_interval = self.flush_interval
+
+    def close(self):
+        _write_behind_repositories.discard(self)
+        if self.write_behind:
+            self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _schedule_flush(self, interval):
+        self._timer = threading.Timer(interval, self._flush_on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_on_timer(self):
+        with self._pending_lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Write-behind flush of shipping statuses failed")
+
+    def _requeue(self, updates):
+        with self._pending_lock:
+            newer = self._pending
+            self._pending = dict(updates)
+            self._inflight = {}
+            # Updates queued while the batch was being written are newer.
+            for shipping_id, (status, expected_status) in newer.items():
+                self._queue(self._pending, shipping_id, status, expected_status)
+
+            if self._timer is None and self.flush_interval > 0:
+                self._retry_interval = min(self._retry_interval * 2, MAX_RETRY_INTERVAL)
+                self._schedule_flush(self._retry_interval)
+
+    @staticmethod
+    def _queue(pending, shipping_id, status, expected_status):
+        previous = pending.get(shipping_id)
+        if previous is not None:
+            if expected_status is not None and expected_status != previous[0]:
+                # The update would fail once the queued status is written.
+                return
+            # The table still holds the state the first queued transition
+            # expected, so a coalesced update keeps that precondition.
+            expected_status = previous[1]
+            del pending[shipping_id]
+        # Re-inserting moves the shipment to the end, so its final status
+        # is written after anything that was queued before it.
+        pending[shipping_id] = (status, expected_status)
+
+    def _write_status(self, shipping_id, status, expected_status=None):
+        update = {
+            'Key': {
                 'shipping_id': shipping_id,
             },
-            UpdateExpression='SET shipping_status = :sh_status',
-            ExpressionAttributeValues={
+            'UpdateExpression': 'SET shipping_status = :sh_status',
+            'ExpressionAttributeValues': {
                 ':sh_status': status
             }
-        )
+        }
+        if expected_status is not None:
+            update['ConditionExpression'] = 'shipping_status = :expected_status'
+            update['ExpressionAttributeValues'][':expected_status'] = expected_status
+
+        try:
+            response = self.table.update_item(**update)
+        except ClientError as error:
+            if error.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return error.response
 
         return response
+
+    def _write_batch(self, batch):
+        if len(batch) == 1:
+            shipping_id, (status, expected_status) = batch[0]
+            return self._write_status(shipping_id, status, expected_status)
+
+        # Coalescing guarantees one entry per shipment, which a transaction requires.
+        try:
+            return self.table.meta.client.transact_write_items(
+                TransactItems=[self._transact_update(shipping_id, status, expected_status)
+                               for shipping_id, (status, expected_status) in batch]
+            )
+        except ClientError as error:
+            if error.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            codes = [reason.get('Code') for reason in error.response.get('CancellationReasons', [])]
+            if len(codes) != len(batch) or not set(codes) <= {'None', 'ConditionalCheckFailed'}:
+                raise
+            # Updates whose precondition failed are stale; write the rest again.
+            remaining = [update for update, code in zip(batch, codes) if code != 'ConditionalCheckFailed']
+            if remaining:
+                return self._write_batch(remaining)
+            return error.response
+
+    def _transact_update(self, shipping_id, status, expected_status):
+        update = {
+            'TableName': self.table.name,
+            'Key': {'shipping_id': {'S': shipping_id}},
+            'UpdateExpression': 'SET shipping_status = :sh_status',
+            'ExpressionAttributeValues': {':sh_status': {'S': status}},
+        }
+        if expected_status is not None:
+            update['ConditionExpression'] = 'shipping_status = :expected_status'
+            update['ExpressionAttributeValues'][':expected_status'] = {'S': expected_status}
+
+        return {'Update': update}
@@ -27,7 +27,9 @@ class ShippingService:
         shipping_id = self.repository.create_shipping(shipping_type, product_ids, order_id, self.SHIPPING_CREATED, due_date)
 
         self.publisher.send_new_shipping(shipping_id)
-        self.repository.update_shipping_status(shipping_id, self.SHIPPING_IN_PROGRESS)
+        # A worker may already have finished the shipping; never move it back.
+        self.repository.update_shipping_status(shipping_id, self.SHIPPING_IN_PROGRESS,
+                                               expected_status=self.SHIPPING_CREATED)
 
         return shipping_id
 
@@ -55,7 +55,8 @@ def test_shipping_status_change_on_creation(mock_shipping_service):
     order = Order(cart, shipping_service)
     order.place_order("Нова Пошта", datetime.now(timezone.utc) + timedelta(minutes=5))
 
-    mock_repo.update_shipping_status.assert_called_with("test_shipping_id", shipping_service.SHIPPING_IN_PROGRESS)
+    mock_repo.update_shipping_status.assert_called_with("test_shipping_id", shipping_service.SHIPPING_IN_PROGRESS,
+                                                        expected_status=shipping_service.SHIPPING_CREATED)
 
 
 def test_message_sent_to_sqs_on_creation(mock_shipping_service):
@@ -0,0 +1,250 @@
+import gc
+import time
+import weakref
+import pytest
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from services import repository as repository_module
+from services.repository import ShippingRepository
+
+
+@pytest.fixture
+def table(mocker):
+    table = MagicMock()
+    table.name = "ShippingTable"
+    mocker.patch("services.repository.get_dynamodb_resource").return_value.Table.return_value = table
+    return table
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Condition was not met in time"
+        time.sleep(0.01)
+
+
+def conditional_check_failed():
+    return ClientError({"Error": {"Code": "ConditionalCheckFailedException"}, "ResponseMetadata": {"HTTPStatusCode": 400}}, "UpdateItem")
+
+
+def test_update_status_writes_immediately_by_default(table):
+    repository = ShippingRepository(write_behind=False)
+
+    repository.update_shipping_status("shipping_1", "in progress")
+
+    table.update_item.assert_called_once()
+
+
+def test_write_behind_coalesces_transitions_of_same_shipping(table):
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+
+    repository.update_shipping_status("shipping_1", "in progress")
+    repository.update_shipping_status("shipping_1", "completed")
+    table.update_item.assert_not_called()
+
+    repository.flush()
+
+    table.update_item.assert_called_once_with(
+        Key={'shipping_id': "shipping_1"},
+        UpdateExpression='SET shipping_status = :sh_status',
+        ExpressionAttributeValues={':sh_status': "completed"}
+    )
+
+
+def test_write_behind_groups_updates_into_transaction(table):
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+
+    repository.update_shipping_status("shipping_1", "completed")
+    repository.update_shipping_status("shipping_2", "failed")
+    repository.flush()
+
+    items = table.meta.client.transact_write_items.call_args.kwargs["TransactItems"]
+    assert [item['Update']['Key']['shipping_id']['S'] for item in items] == ["shipping_1", "shipping_2"]
+    assert [item['Update']['ExpressionAttributeValues'][':sh_status']['S'] for item in items] == ["completed", "failed"]
+
+
+def test_write_behind_flushes_when_batch_is_full(table):
+    repository = ShippingRepository(write_behind=True, flush_batch_size=2, flush_interval=0)
+
+    repository.update_shipping_status("shipping_1", "completed")
+    repository.update_shipping_status("shipping_2", "completed")
+
+    table.meta.client.transact_write_items.assert_called_once()
+
+
+def test_get_shipping_returns_pending_status(table):
+    table.get_item.return_value = {"Item": {"shipping_id": "shipping_1", "shipping_status": "created"}}
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+
+    repository.update_shipping_status("shipping_1", "in progress")
+
+    assert repository.get_shipping("shipping_1")["shipping_status"] == "in progress"
+
+
+def test_failed_flush_keeps_updates_pending(table):
+    table.update_item.side_effect = [RuntimeError("throttled"), {}]
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+    repository.update_shipping_status("shipping_1", "completed")
+
+    with pytest.raises(RuntimeError):
+        repository.flush()
+    repository.close()
+
+    assert table.update_item.call_count == 2
+
+
+def test_write_behind_response_keeps_response_shape(table):
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+
+    response = repository.update_shipping_status("shipping_1", "completed")
+
+    assert response['ResponseMetadata']['HTTPStatusCode'] == 202
+    repository.close()
+
+
+def test_timer_flushes_pending_updates(table):
+    repository = ShippingRepository(write_behind=True, flush_interval=0.01)
+
+    repository.update_shipping_status("shipping_1", "completed")
+
+    wait_for(lambda: table.update_item.call_count == 1)
+    repository.close()
+
+
+def test_failed_timer_flush_is_retried(table):
+    table.update_item.side_effect = [RuntimeError("throttled"), {}]
+    repository = ShippingRepository(write_behind=True, flush_interval=0.01)
+
+    repository.update_shipping_status("shipping_1", "completed")
+
+    wait_for(lambda: table.update_item.call_count == 2)
+    wait_for(lambda: not repository._pending and repository._timer is None)
+    repository.close()
+
+
+def test_failed_batch_requeues_remaining_updates_in_order(table):
+    table.meta.client.transact_write_items.side_effect = [{}, RuntimeError("throttled")]
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+    for shipping_id in ("shipping_1", "shipping_2", "shipping_3", "shipping_4", "shipping_5"):
+        repository.update_shipping_status(shipping_id, "completed")
+    repository.flush_batch_size = 2
+
+    with pytest.raises(RuntimeError):
+        repository.flush()
+
+    assert list(repository._pending) == ["shipping_3", "shipping_4", "shipping_5"]
+    assert not repository._inflight
+
+
+def test_get_shipping_returns_status_while_it_is_being_written(table):
+    table.get_item.return_value = {"Item": {"shipping_id": "shipping_1", "shipping_status": "created"}}
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+    statuses = []
+    table.update_item.side_effect = lambda **kwargs: statuses.append(repository.get_shipping("shipping_1")["shipping_status"])
+
+    repository.update_shipping_status("shipping_1", "in progress")
+    repository.flush()
+
+    assert statuses == ["in progress"]
+    assert repository.get_shipping("shipping_1")["shipping_status"] == "created"
+
+
+def test_late_update_does_not_overwrite_newer_status(table):
+    table.update_item.side_effect = conditional_check_failed()
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+
+    repository.update_shipping_status("shipping_1", "in progress", expected_status="created")
+    repository.flush()
+
+    kwargs = table.update_item.call_args.kwargs
+    assert kwargs['ConditionExpression'] == 'shipping_status = :expected_status'
+    assert kwargs['ExpressionAttributeValues'][':expected_status'] == "created"
+    assert not repository._pending
+
+
+def test_late_update_is_dropped_from_transaction(table):
+    table.meta.client.transact_write_items.side_effect = [
+        ClientError({"Error": {"Code": "TransactionCanceledException"},
+                     "CancellationReasons": [{"Code": "ConditionalCheckFailed"}, {"Code": "None"}]},
+                    "TransactWriteItems"),
+    ]
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+
+    repository.update_shipping_status("shipping_1", "in progress", expected_status="created")
+    repository.update_shipping_status("shipping_2", "completed")
+    repository.flush()
+
+    table.update_item.assert_called_once_with(
+        Key={'shipping_id': "shipping_2"},
+        UpdateExpression='SET shipping_status = :sh_status',
+        ExpressionAttributeValues={':sh_status': "completed"}
+    )
+
+
+def test_coalesced_update_keeps_first_precondition(table):
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+
+    repository.update_shipping_status("shipping_1", "in progress", expected_status="created")
+    repository.update_shipping_status("shipping_1", "completed")
+    repository.flush()
+
+    assert table.update_item.call_args.kwargs['ExpressionAttributeValues'] == {
+        ':sh_status': "completed", ':expected_status': "created"}
+
+
+def test_conditional_update_after_other_status_is_dropped(table):
+    table.get_item.return_value = {"Item": {"shipping_id": "shipping_1", "shipping_status": "created"}}
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+
+    repository.update_shipping_status("shipping_1", "completed")
+    repository.update_shipping_status("shipping_1", "in progress", expected_status="created")
+
+    assert repository.get_shipping("shipping_1")["shipping_status"] == "completed"
+    repository.flush()
+    table.update_item.assert_called_once_with(
+        Key={'shipping_id': "shipping_1"},
+        UpdateExpression='SET shipping_status = :sh_status',
+        ExpressionAttributeValues={':sh_status': "completed"}
+    )
+
+
+def test_conditional_update_matching_queued_status_is_coalesced(table):
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+
+    repository.update_shipping_status("shipping_1", "in progress")
+    repository.update_shipping_status("shipping_1", "completed", expected_status="in progress")
+    repository.flush()
+
+    table.update_item.assert_called_once_with(
+        Key={'shipping_id': "shipping_1"},
+        UpdateExpression='SET shipping_status = :sh_status',
+        ExpressionAttributeValues={':sh_status': "completed"}
+    )
+
+
+def test_failed_size_triggered_flush_does_not_raise(table):
+    table.meta.client.transact_write_items.side_effect = RuntimeError("throttled")
+    repository = ShippingRepository(write_behind=True, flush_batch_size=2, flush_interval=0)
+
+    repository.update_shipping_status("shipping_1", "completed")
+    response = repository.update_shipping_status("shipping_2", "failed")
+
+    assert response['ResponseMetadata']['HTTPStatusCode'] == 202
+    assert list(repository._pending) == ["shipping_1", "shipping_2"]
+
+def test_write_behind_repository_is_not_kept_alive(table):
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+    reference = weakref.ref(repository)
+
+    del repository
+    gc.collect()
+
+    assert reference() is None
+
+
+def test_close_unregisters_exit_flush(table):
+    repository = ShippingRepository(write_behind=True, flush_interval=0)
+
+    repository.close()
+
+    assert repository not in repository_module._write_behind_repositories
@@ -1,5 +1,7 @@
+import os
+import tempfile
 import unittest
-from app.eshop import Product, ShoppingCart, Order
+from app.eshop import Product, ShoppingCart, Order, StockLoader
 from unittest.mock import MagicMock
 
 
@@ -58,5 +60,104 @@ class TestEshop(unittest.TestCase):
         self.assertEqual(len(self.cart.products), 0)
 
 
+class TestStockLoader(unittest.TestCase):
+    def setUp(self):
+        self.product = Product(name='Test1', price=100.0, available_amount=10)
+        self.loader = StockLoader({'Test1': self.product}, chunk_size=2)
+
+    def write_feed(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w', encoding='utf-8') as feed:
+            feed.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_load_csv_creates_products(self):
+        path = self.write_feed('.csv', 'name,price,available_amount\nTest2,50.0,5\nTest3,20.0,1\nTest4,1.5,0\n')
+        stats = self.loader.load(path)
+        self.assertEqual(stats.rows, 3)
+        self.assertEqual(stats.created, 3)
+        self.assertEqual(self.loader.catalog['Test2'].price, 50.0)
+        self.assertEqual(self.loader.catalog['Test4'].available_amount, 0)
+
+    def test_load_jsonl_applies_stock_delta_in_place(self):
+        path = self.write_feed('.jsonl', '{"name": "Test1", "stock_delta": -4}\n\n{"name": "Test1", "stock_delta": 1}\n')
+        stats = self.loader.load(path)
+        self.assertEqual(stats.updated, 1)
+        self.assertIs(self.loader.catalog['Test1'], self.product)
+        self.assertEqual(self.product.available_amount, 7)
+
+    def test_load_rejects_negative_price(self):
+        path = self.write_feed('.csv', 'name,price,available_amount\nTest2,-1.0,5\n')
+        with self.assertRaisesRegex(ValueError, "Price cannot be negative"):
+            self.loader.load(path)
+        self.assertNotIn('Test2', self.loader.catalog)
+
+    def test_load_rejects_negative_stock_and_keeps_chunk_unapplied(self):
+        path = self.write_feed('.csv', 'name,stock_delta\nTest1,-5\nTest1,-6\n')
+        with self.assertRaisesRegex(ValueError, "Available amount cannot be negative"):
+            self.loader.load(path)
+        self.assertEqual(self.product.available_amount, 10)
+
+    def test_load_rejects_fractional_quantities(self):
+        path = self.write_feed('.jsonl', '{"name": "Test2", "price": 1.0, "available_amount": 2.9}\n')
+        with self.assertRaisesRegex(ValueError, "Invalid stock row 1: Expected a whole number"):
+            self.loader.load(path)
+        self.assertNotIn('Test2', self.loader.catalog)
+
+    def test_load_rejects_boolean_quantities(self):
+        path = self.write_feed('.jsonl', '{"name": "Test1", "stock_delta": true}\n')
+        with self.assertRaisesRegex(ValueError, "Expected a number"):
+            self.loader.load(path)
+        self.assertEqual(self.product.available_amount, 10)
+
+    def test_load_accepts_integral_decimal_quantities(self):
+        path = self.write_feed('.csv', 'name,price,available_amount\nTest2,50,5.0\n')
+        self.loader.load(path)
+        self.assertEqual(self.loader.catalog['Test2'].available_amount, 5)
+
+    def test_load_reports_line_of_malformed_json(self):
+        path = self.write_feed('.jsonl', '{"name": "Test1", "stock_delta": 1}\n\n{"name": \n')
+        with self.assertRaisesRegex(ValueError, "Invalid stock row at line 3"):
+            self.loader.load(path)
+
+    def test_load_csv_with_byte_order_mark(self):
+        path = self.write_feed('.csv', '\ufeffname,stock_delta\nTest1,2\n')
+        self.loader.load(path)
+        self.assertEqual(self.product.available_amount, 12)
+
+    def test_load_rejects_missing_or_non_string_names(self):
+        for content in ('{"name": null, "price": 1.0, "available_amount": 1}\n',
+                        '{"name": 5, "price": 1.0, "available_amount": 1}\n'):
+            path = self.write_feed('.jsonl', content)
+            with self.assertRaisesRegex(ValueError, "Invalid stock row 1: Expected a product name"):
+                self.loader.load(path)
+        path = self.write_feed('.csv', 'name,price,available_amount\n,1.0,1\n')
+        with self.assertRaisesRegex(ValueError, "Invalid stock row 1: Expected a product name"):
+            self.loader.load(path)
+        self.assertEqual(list(self.loader.catalog), ['Test1'])
+
+    def test_load_rejects_stock_delta_mixed_with_price(self):
+        path = self.write_feed('.jsonl', '{"name": "Test1", "stock_delta": 1, "price": 99}\n')
+        with self.assertRaisesRegex(ValueError, "stock_delta cannot be combined"):
+            self.loader.load(path)
+        self.assertEqual(self.product.available_amount, 10)
+        self.assertEqual(self.product.price, 100.0)
+
+    def test_load_rejects_overflowing_price(self):
+        path = self.write_feed('.jsonl', '{"name": "Test2", "price": 1' + '0' * 400 + ', "available_amount": 1}\n')
+        with self.assertRaisesRegex(ValueError, "Invalid stock row 1: Expected a finite number"):
+            self.loader.load(path)
+
+    def test_load_rejects_underscores_in_numbers(self):
+        path = self.write_feed('.csv', 'name,price,available_amount\nTest2,1.0,1_000\n')
+        with self.assertRaisesRegex(ValueError, "Expected a number"):
+            self.loader.load(path)
+
+    def test_load_empty_feed(self):
+        path = self.write_feed('.jsonl', '')
+        self.assertEqual(self.loader.load(path).rows, 0)
+
+
 if __name__ == '__main__':
     unittest.main()